@@ -7,7 +7,9 @@ for extracurricular activities at Mergington High School.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+from collections import defaultdict
+import json
 import os
 from pathlib import Path
 
@@ -25,59 +27,77 @@ activities = {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     },
     "Basketball Team": {
         "description": "Competitive basketball training and matches",
         "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
         "max_participants": 15,
-        "participants": ["alex@mergington.edu"]
+        "participants": {"alex@mergington.edu"}
     },
     "Tennis Club": {
         "description": "Tennis coaching and tournament preparation",
         "schedule": "Wednesdays and Saturdays, 3:00 PM - 4:30 PM",
         "max_participants": 10,
-        "participants": ["jacob@mergington.edu", "lucas@mergington.edu"]
+        "participants": {"jacob@mergington.edu", "lucas@mergington.edu"}
     },
     "Art Studio": {
         "description": "Painting, drawing, and visual arts creation",
         "schedule": "Mondays and Thursdays, 3:30 PM - 5:00 PM",
         "max_participants": 18,
-        "participants": ["isabella@mergington.edu"]
+        "participants": {"isabella@mergington.edu"}
     },
     "Music Band": {
         "description": "Join the school band and perform in concerts",
         "schedule": "Wednesdays and Fridays, 4:00 PM - 5:30 PM",
         "max_participants": 25,
-        "participants": ["noah@mergington.edu", "ava@mergington.edu"]
+        "participants": {"noah@mergington.edu", "ava@mergington.edu"}
     },
     "Science Club": {
         "description": "Explore scientific experiments and discoveries",
         "schedule": "Tuesdays, 3:30 PM - 4:30 PM",
         "max_participants": 16,
-        "participants": ["mia@mergington.edu"]
+        "participants": {"mia@mergington.edu"}
     },
     "Debate Team": {
         "description": "Develop public speaking and critical thinking skills",
         "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
         "max_participants": 14,
-        "participants": ["ethan@mergington.edu", "charlotte@mergington.edu"]
+        "participants": {"ethan@mergington.edu", "charlotte@mergington.edu"}
     }
 }
 
 
+def build_student_index(source):
+    """Map each student email to the set of activity names they joined"""
+    index = defaultdict(set)
+    for name, details in source.items():
+        for email in details["participants"]:
+            index[email].add(name)
+    return index
+
+
+# Reverse index of activities per student, kept in sync by signup/unregister
+student_index = build_student_index(activities)
+
+
+# Bumped on every mutation so GET /activities can reuse its last serialized body
+activities_version = 0
+_activities_cache = (None, None, None)  # (activities dict, version, JSON body)
+
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/static/index.html")
@@ -85,38 +105,49 @@ def root():
 
 @app.get("/activities")
 def get_activities():
-    return activities
+    global _activities_cache
+    cached_for, cached_version, body = _activities_cache
+    version = activities_version
+    if cached_for is not activities or cached_version != version:
+        # Participants are stored as sets; serialize them as sorted lists
+        body = json.dumps({
+            name: {**details, "participants": sorted(details["participants"])}
+            for name, details in activities.items()
+        }, ensure_ascii=False, separators=(",", ":"))
+        _activities_cache = (activities, version, body)
+    return Response(body, media_type="application/json")
 
 
 @app.post("/activities/{activity_name}/signup")
 def signup_for_activity(activity_name: str, email: str):
     """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
-
-    # Get the specific activity
-    activity = activities[activity_name]
-
-    # Validate student not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")  
+    global activities_version
 
+    # Get the specific activity, validating that it exists
+    activity = activities.get(activity_name)
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
 
-    # Add student
-    activity["participants"].append(email)
+    # Add student; an unchanged set size means they were already signed up
+    participants = activity["participants"]
+    before = len(participants)
+    participants.add(email)
+    if len(participants) == before:
+        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
+    student_index[email].add(activity_name)
+    activities_version += 1
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
 @app.delete("/activities/{activity_name}/unregister")
 def unregister_from_activity(activity_name: str, email: str):
     """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    global activities_version
 
-    # Get the specific activity
-    activity = activities[activity_name]
+    # Get the specific activity, validating that it exists
+    activity = activities.get(activity_name)
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
 
     # Validate student is registered
     if email not in activity["participants"]:
@@ -124,4 +155,10 @@ def unregister_from_activity(activity_name: str, email: str):
 
     # Remove student
     activity["participants"].remove(email)
+    joined = student_index.get(email)
+    if joined is not None:
+        joined.discard(activity_name)
+        if not joined:
+            del student_index[email]
+    activities_version += 1
     return {"message": f"Unregistered {email} from {activity_name}"}
@@ -2,105 +2,166 @@
 Tests for the Mergington High School Activities API
 """
 
+import types
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from src.app import app, activities
+import src.app as app_module
+from src.app import app
 
+pytestmark = pytest.mark.anyio
 
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI app"""
-    return TestClient(app)
 
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run the async tests and fixtures on asyncio"""
+    return "asyncio"
 
-@pytest.fixture
-def reset_activities():
-    """Reset activities to initial state before each test"""
-    original_activities = {
+
+@pytest.fixture(scope="session")
+async def client():
+    """Create a single async client driving the ASGI app directly, shared by the whole session"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as c:
+        yield c
+
+
+def _freeze(raw):
+    """Return a read-only copy of raw activity data; participants must be tuples"""
+    return types.MappingProxyType({
+        name: types.MappingProxyType(dict(details))
+        for name, details in raw.items()
+    })
+
+
+# Frozen pristine activity data, built once at import time; writes to it raise
+_PRISTINE = _freeze(
+    {
         "Chess Club": {
             "description": "Learn strategies and compete in chess tournaments",
             "schedule": "Fridays, 3:30 PM - 5:00 PM",
             "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+            "participants": ("michael@mergington.edu", "daniel@mergington.edu")
         },
         "Programming Class": {
             "description": "Learn programming fundamentals and build software projects",
             "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
             "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+            "participants": ("emma@mergington.edu", "sophia@mergington.edu")
         },
         "Gym Class": {
             "description": "Physical education and sports activities",
             "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
             "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+            "participants": ("john@mergington.edu", "olivia@mergington.edu")
         },
         "Basketball Team": {
             "description": "Competitive basketball training and matches",
             "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
             "max_participants": 15,
-            "participants": ["alex@mergington.edu"]
+            "participants": ("alex@mergington.edu",)
         },
         "Tennis Club": {
             "description": "Tennis coaching and tournament preparation",
             "schedule": "Wednesdays and Saturdays, 3:00 PM - 4:30 PM",
             "max_participants": 10,
-            "participants": ["jacob@mergington.edu", "lucas@mergington.edu"]
+            "participants": ("jacob@mergington.edu", "lucas@mergington.edu")
         },
         "Art Studio": {
             "description": "Painting, drawing, and visual arts creation",
             "schedule": "Mondays and Thursdays, 3:30 PM - 5:00 PM",
             "max_participants": 18,
-            "participants": ["isabella@mergington.edu"]
+            "participants": ("isabella@mergington.edu",)
         },
         "Music Band": {
             "description": "Join the school band and perform in concerts",
             "schedule": "Wednesdays and Fridays, 4:00 PM - 5:30 PM",
             "max_participants": 25,
-            "participants": ["noah@mergington.edu", "ava@mergington.edu"]
+            "participants": ("noah@mergington.edu", "ava@mergington.edu")
         },
         "Science Club": {
             "description": "Explore scientific experiments and discoveries",
             "schedule": "Tuesdays, 3:30 PM - 4:30 PM",
             "max_participants": 16,
-            "participants": ["mia@mergington.edu"]
+            "participants": ("mia@mergington.edu",)
         },
         "Debate Team": {
             "description": "Develop public speaking and critical thinking skills",
             "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
             "max_participants": 14,
-            "participants": ["ethan@mergington.edu", "charlotte@mergington.edu"]
+            "participants": ("ethan@mergington.edu", "charlotte@mergington.edu")
         }
     }
-    
-    # Clear and reset activities
-    activities.clear()
-    activities.update(original_activities)
-    
+)
+
+
+# Request URLs, parsed once per activity
+_SIGNUP_URLS = {name: httpx.URL(f"/activities/{name}/signup") for name in _PRISTINE}
+_UNREGISTER_URLS = {name: httpx.URL(f"/activities/{name}/unregister") for name in _PRISTINE}
+
+
+def _fresh():
+    """Return a copy of _PRISTINE with freshly allocated participant sets"""
+    fresh = {}
+    for name, details in _PRISTINE.items():
+        # mappingproxy.copy() returns a plain dict via the C fast path
+        activity = details.copy()
+        activity["participants"] = set(activity["participants"])
+        fresh[name] = activity
+    return fresh
+
+
+def _reset():
+    """Rebind the app state to a fresh copy of the pristine activities"""
+    app_module.activities = _fresh()
+    app_module.student_index = app_module.build_student_index(app_module.activities)
+
+
+@pytest.fixture
+def reset_activities():
+    """Reset activities to initial state before each test"""
+    _reset()
+    # No teardown: the next test's setup reseeds the data
+
+
+@pytest.fixture(scope="class")
+def read_only_activities():
+    """Reset activities once for a class of tests that never mutate them"""
+    _reset()
+
+
+@pytest.fixture(scope="class")
+async def activities_response(client, read_only_activities):
+    """Issue GET /activities once for a class of read-only tests"""
+    return await client.get("/activities")
+
+
+@pytest.fixture(scope="class")
+def activities_data(activities_response):
+    """Decode the shared GET /activities response body once"""
+    return activities_response.json()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def restore_activities_after_session():
+    """Leave activities in their initial state once the session ends"""
     yield
-    
-    # Cleanup after test
-    activities.clear()
-    activities.update(original_activities)
+    _reset()
 
 
 class TestGetActivities:
     """Tests for the GET /activities endpoint"""
     
-    def test_get_activities_returns_all_activities(self, client, reset_activities):
+    async def test_get_activities_returns_all_activities(self, activities_response, activities_data):
         """Test that GET /activities returns all activities"""
-        response = client.get("/activities")
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data) == 9
-        assert "Chess Club" in data
-        assert "Programming Class" in data
+        assert activities_response.status_code == 200
+        assert len(activities_data) == 9
+        assert "Chess Club" in activities_data
+        assert "Programming Class" in activities_data
         
-    def test_get_activities_has_correct_structure(self, client, reset_activities):
+    async def test_get_activities_has_correct_structure(self, activities_data):
         """Test that activities have the correct structure"""
-        response = client.get("/activities")
-        data = response.json()
-        activity = data["Chess Club"]
+        activity = activities_data["Chess Club"]
         
         assert "description" in activity
         assert "schedule" in activity
@@ -108,12 +169,9 @@ class TestGetActivities:
         assert "participants" in activity
         assert isinstance(activity["participants"], list)
         
-    def test_get_activities_returns_participants(self, client, reset_activities):
+    async def test_get_activities_returns_participants(self, activities_data):
         """Test that activities include their participants"""
-        response = client.get("/activities")
-        data = response.json()
-        
-        chess_club = data["Chess Club"]
+        chess_club = activities_data["Chess Club"]
         assert "michael@mergington.edu" in chess_club["participants"]
         assert "daniel@mergington.edu" in chess_club["participants"]
 
@@ -121,185 +179,202 @@ class TestGetActivities:
 class TestSignup:
     """Tests for the POST /activities/{activity_name}/signup endpoint"""
     
-    def test_signup_new_participant_success(self, client, reset_activities):
-        """Test successful signup of a new participant"""
-        response = client.post(
-            "/activities/Chess Club/signup?email=newstudent@mergington.edu"
-        )
-        assert response.status_code == 200
+    @pytest.mark.parametrize(
+        "url,activity_name,email,expected_status,field,expected_fragment",
+        [
+            (_SIGNUP_URLS["Chess Club"], "Chess Club", "newstudent@mergington.edu",
+             200, "message", "Signed up"),
+            (_SIGNUP_URLS["Chess Club"], "Chess Club", "michael@mergington.edu",
+             400, "detail", "already signed up"),
+            pytest.param(httpx.URL("/activities/Nonexistent Activity/signup"),
+                         "Nonexistent Activity", "newstudent@mergington.edu",
+                         404, "detail", "Activity not found", marks=pytest.mark.edge),
+        ],
+        ids=["new_participant", "duplicate_participant", "nonexistent_activity"],
+    )
+    async def test_signup(self, client, reset_activities, url, activity_name, email,
+                          expected_status, field, expected_fragment):
+        """Test signup success, duplicate and unknown-activity responses"""
+        response = await client.post(url, params={"email": email})
+        assert response.status_code == expected_status
         data = response.json()
-        assert "Signed up" in data["message"]
-        assert "newstudent@mergington.edu" in data["message"]
-        
-        # Verify participant was added
-        activities_response = client.get("/activities")
-        assert "newstudent@mergington.edu" in activities_response.json()["Chess Club"]["participants"]
-    
-    def test_signup_duplicate_participant_fails(self, client, reset_activities):
-        """Test that signing up a participant already registered fails"""
-        response = client.post(
-            "/activities/Chess Club/signup?email=michael@mergington.edu"
-        )
-        assert response.status_code == 400
-        data = response.json()
-        assert "already signed up" in data["detail"]
-    
-    def test_signup_nonexistent_activity_fails(self, client, reset_activities):
-        """Test that signing up for a non-existent activity fails"""
-        response = client.post(
-            "/activities/Nonexistent Activity/signup?email=newstudent@mergington.edu"
-        )
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
+        assert expected_fragment in data[field]
+
+        # Verify participant was added on success
+        if expected_status == 200:
+            assert email in data["message"]
+            assert email in app_module.activities[activity_name]["participants"]
     
-    def test_signup_different_activities(self, client, reset_activities):
+    async def test_signup_different_activities(self, client, reset_activities):
         """Test that a student can sign up for multiple different activities"""
         email = "student@mergington.edu"
         
         # Sign up for first activity
-        response1 = client.post(f"/activities/Chess Club/signup?email={email}")
+        response1 = await client.post(_SIGNUP_URLS["Chess Club"], params={"email": email})
         assert response1.status_code == 200
         
         # Sign up for second activity
-        response2 = client.post(f"/activities/Programming Class/signup?email={email}")
+        response2 = await client.post(_SIGNUP_URLS["Programming Class"], params={"email": email})
         assert response2.status_code == 200
         
         # Verify in both activities
-        activities_response = client.get("/activities")
-        data = activities_response.json()
-        assert email in data["Chess Club"]["participants"]
-        assert email in data["Programming Class"]["participants"]
+        assert email in app_module.activities["Chess Club"]["participants"]
+        assert email in app_module.activities["Programming Class"]["participants"]
+        assert app_module.student_index.get(email, set()) == {"Chess Club", "Programming Class"}
     
-    def test_signup_updates_participant_count(self, client, reset_activities):
+    async def test_signup_updates_participant_count(self, client, reset_activities):
         """Test that signup updates the participant count correctly"""
         email = "newstudent@mergington.edu"
         
         # Get initial count
-        initial_response = client.get("/activities")
-        initial_count = len(initial_response.json()["Art Studio"]["participants"])
+        initial_count = len(app_module.activities["Art Studio"]["participants"])
         
         # Sign up
-        client.post(f"/activities/Art Studio/signup?email={email}")
+        await client.post(_SIGNUP_URLS["Art Studio"], params={"email": email})
         
         # Get updated count
-        updated_response = client.get("/activities")
-        updated_count = len(updated_response.json()["Art Studio"]["participants"])
+        updated_count = len(app_module.activities["Art Studio"]["participants"])
         
         assert updated_count == initial_count + 1
+    
+    async def test_signup_refreshes_cached_activities(self, client, reset_activities):
+        """Test that GET /activities reflects a signup made after a previous GET"""
+        email = "newstudent@mergington.edu"
+        await client.get("/activities")
+        
+        await client.post(_SIGNUP_URLS["Science Club"], params={"email": email})
+        
+        data = (await client.get("/activities")).json()
+        assert email in data["Science Club"]["participants"]
 
 
 class TestUnregister:
     """Tests for the DELETE /activities/{activity_name}/unregister endpoint"""
     
-    def test_unregister_participant_success(self, client, reset_activities):
-        """Test successful unregistration of a participant"""
-        response = client.delete(
-            "/activities/Chess Club/unregister?email=michael@mergington.edu"
-        )
-        assert response.status_code == 200
+    @pytest.mark.parametrize(
+        "url,activity_name,email,expected_status,field,expected_fragment",
+        [
+            (_UNREGISTER_URLS["Chess Club"], "Chess Club", "michael@mergington.edu",
+             200, "message", "Unregistered"),
+            pytest.param(httpx.URL("/activities/Nonexistent Activity/unregister"),
+                         "Nonexistent Activity", "test@mergington.edu",
+                         404, "detail", "Activity not found", marks=pytest.mark.edge),
+            (_UNREGISTER_URLS["Chess Club"], "Chess Club", "notregistered@mergington.edu",
+             400, "detail", "not registered"),
+        ],
+        ids=["registered_participant", "nonexistent_activity", "not_registered"],
+    )
+    async def test_unregister(self, client, reset_activities, url, activity_name, email,
+                              expected_status, field, expected_fragment):
+        """Test unregister success, unknown-activity and not-registered responses"""
+        response = await client.delete(url, params={"email": email})
+        assert response.status_code == expected_status
         data = response.json()
-        assert "Unregistered" in data["message"]
-        
-        # Verify participant was removed
-        activities_response = client.get("/activities")
-        assert "michael@mergington.edu" not in activities_response.json()["Chess Club"]["participants"]
-    
-    def test_unregister_nonexistent_activity_fails(self, client, reset_activities):
-        """Test that unregistering from a non-existent activity fails"""
-        response = client.delete(
-            "/activities/Nonexistent Activity/unregister?email=test@mergington.edu"
-        )
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
-    
-    def test_unregister_participant_not_registered_fails(self, client, reset_activities):
-        """Test that unregistering a participant not registered fails"""
-        response = client.delete(
-            "/activities/Chess Club/unregister?email=notregistered@mergington.edu"
-        )
-        assert response.status_code == 400
-        data = response.json()
-        assert "not registered" in data["detail"]
+        assert expected_fragment in data[field]
+
+        # Verify participant was removed on success
+        if expected_status == 200:
+            assert email not in app_module.activities[activity_name]["participants"]
     
-    def test_unregister_updates_participant_count(self, client, reset_activities):
+    async def test_unregister_updates_participant_count(self, client, reset_activities):
         """Test that unregister updates the participant count correctly"""
         email = "michael@mergington.edu"
         
         # Get initial count
-        initial_response = client.get("/activities")
-        initial_count = len(initial_response.json()["Chess Club"]["participants"])
+        initial_count = len(app_module.activities["Chess Club"]["participants"])
         
         # Unregister
-        client.delete(f"/activities/Chess Club/unregister?email={email}")
+        await client.delete(_UNREGISTER_URLS["Chess Club"], params={"email": email})
         
         # Get updated count
-        updated_response = client.get("/activities")
-        updated_count = len(updated_response.json()["Chess Club"]["participants"])
+        updated_count = len(app_module.activities["Chess Club"]["participants"])
         
         assert updated_count == initial_count - 1
     
-    def test_signup_then_unregister(self, client, reset_activities):
+    async def test_signup_then_unregister(self, client, reset_activities):
         """Test full lifecycle: signup then unregister"""
         email = "lifecycle@mergington.edu"
         
         # Sign up
-        signup_response = client.post(f"/activities/Tennis Club/signup?email={email}")
+        signup_response = await client.post(_SIGNUP_URLS["Tennis Club"], params={"email": email})
         assert signup_response.status_code == 200
         
         # Verify signed up
-        activities_response = client.get("/activities")
-        assert email in activities_response.json()["Tennis Club"]["participants"]
+        assert email in app_module.activities["Tennis Club"]["participants"]
         
         # Unregister
-        unregister_response = client.delete(f"/activities/Tennis Club/unregister?email={email}")
+        unregister_response = await client.delete(_UNREGISTER_URLS["Tennis Club"], params={"email": email})
         assert unregister_response.status_code == 200
         
         # Verify unregistered
-        final_response = client.get("/activities")
-        assert email not in final_response.json()["Tennis Club"]["participants"]
+        assert email not in app_module.activities["Tennis Club"]["participants"]
+        assert email not in app_module.student_index
+    
+    async def test_unregister_refreshes_cached_activities(self, client, reset_activities):
+        """Test that GET /activities reflects an unregister made after a previous GET"""
+        email = "michael@mergington.edu"
+        await client.get("/activities")
+        
+        await client.delete(_UNREGISTER_URLS["Chess Club"], params={"email": email})
+        
+        data = (await client.get("/activities")).json()
+        assert email not in data["Chess Club"]["participants"]
 
 
 class TestEdgeCases:
     """Tests for edge cases and special scenarios"""
     
-    def test_signup_with_special_characters_in_email(self, client, reset_activities):
+    async def test_signup_with_special_characters_in_email(self, client, reset_activities):
         """Test signup with email containing special characters"""
         email = "student.tag@mergington.edu"
-        response = client.post(f"/activities/Chess Club/signup?email={email}")
+        response = await client.post(_SIGNUP_URLS["Chess Club"], params={"email": email})
         assert response.status_code == 200
         
-        activities_response = client.get("/activities")
-        assert email in activities_response.json()["Chess Club"]["participants"]
+        assert email in app_module.activities["Chess Club"]["participants"]
     
-    def test_activity_name_case_sensitivity(self, client, reset_activities):
+    @pytest.mark.edge
+    async def test_activity_name_case_sensitivity(self, client, reset_activities):
         """Test that activity names are case-sensitive"""
-        response = client.post("/activities/chess club/signup?email=test@mergington.edu")
+        url = httpx.URL("/activities/chess club/signup")
+        response = await client.post(url, params={"email": "test@mergington.edu"})
         # Should fail because the activity name is "Chess Club" not "chess club"
         assert response.status_code == 404
     
-    def test_multiple_signups_and_unregisters(self, client, reset_activities):
+    async def test_multiple_signups_and_unregisters(self, client, reset_activities):
         """Test multiple sequential signups and unregisters"""
         email = "test@mergington.edu"
         activity = "Gym Class"
         
         # Initial signup
-        response1 = client.post(f"/activities/{activity}/signup?email={email}")
+        response1 = await client.post(_SIGNUP_URLS[activity], params={"email": email})
         assert response1.status_code == 200
         
         # Unregister
-        response2 = client.delete(f"/activities/{activity}/unregister?email={email}")
+        response2 = await client.delete(_UNREGISTER_URLS[activity], params={"email": email})
         assert response2.status_code == 200
         
         # Verify unregistered
-        check1 = client.get("/activities")
-        assert email not in check1.json()[activity]["participants"]
+        assert email not in app_module.activities[activity]["participants"]
         
         # Can sign up again
-        response3 = client.post(f"/activities/{activity}/signup?email={email}")
+        response3 = await client.post(_SIGNUP_URLS[activity], params={"email": email})
         assert response3.status_code == 200
         
         # Verify signed up again
-        check2 = client.get("/activities")
-        assert email in check2.json()[activity]["participants"]
+        assert email in app_module.activities[activity]["participants"]
+    
+    async def test_reset_refreshes_cached_activities(self, client, reset_activities):
+        """Test that rebinding activities invalidates the cached GET /activities body"""
+        email = "newstudent@mergington.edu"
+        original = (await client.get("/activities")).json()["Debate Team"]["participants"]
+        
+        await client.post(_SIGNUP_URLS["Debate Team"], params={"email": email})
+        
+        # Cache the mutated body, so only the dict identity changes on reset
+        mutated = (await client.get("/activities")).json()
+        assert email in mutated["Debate Team"]["participants"]
+        
+        _reset()
+        
+        data = (await client.get("/activities")).json()
+        assert data["Debate Team"]["participants"] == original